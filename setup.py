@@ -37,7 +37,7 @@ setup(
     ],
     description="Bokeh wrapper for creating time based line plots.",
     # install_requires=requirements,
-    install_requires=["bokeh"],
+    install_requires=["bokeh", "numpy"],
     license="MIT license",
     long_description=readme + "\n\n" + history,
     include_package_data=True,
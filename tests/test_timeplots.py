@@ -2,6 +2,9 @@
 
 """Tests for `timeplots` package."""
 
+from datetime import datetime, timedelta, timezone
+
+import numpy
 import pytest
 
 
@@ -22,3 +25,238 @@ def test_content(response):
     """Sample pytest test function with the pytest fixture as an argument."""
     # from bs4 import BeautifulSoup
     # assert 'GitHub' in BeautifulSoup(response.content).title.string
+
+
+@pytest.fixture
+def plotter():
+    """Plotter with one line, and an empty render cache."""
+    timeplots.Plotter.clear_cache()
+    plotter = timeplots.Plotter()
+    plotter.new_plot("Events over Time", "events")
+    plotter.add_line("values", *sample_data())
+    yield plotter
+    timeplots.Plotter.clear_cache()
+
+
+def sample_data():
+    start = datetime(2020, 3, 1, 8)
+    timestamps = [start + timedelta(minutes=i) for i in range(10)]
+    data = list(range(10))
+    return timestamps, data
+
+
+def test_render_cache_hit_and_miss(plotter):
+    script, div = plotter.components()
+    assert len(timeplots.Plotter._cache) == 1
+
+    other = timeplots.Plotter()
+    other.new_plot("Events over Time", "events")
+    other.add_line("values", *sample_data())
+    assert other.fingerprint() == plotter.fingerprint()
+    assert other.components() == (script, div)
+    assert len(timeplots.Plotter._cache) == 1
+
+    other.add_html("<b>changed</b>")
+    assert other.fingerprint() != plotter.fingerprint()
+    other.components()
+    assert len(timeplots.Plotter._cache) == 2
+
+    timeplots.Plotter.clear_cache()
+    assert len(timeplots.Plotter._cache) == 0
+
+
+def test_render_cache_size(plotter, monkeypatch):
+    monkeypatch.setattr(timeplots.Plotter, "cache_size", 2)
+    for target in ("a", "b", "c"):
+        plotter.json_item(target)
+    assert len(timeplots.Plotter._cache) == 2
+
+
+def test_render_cache_bytes(plotter, monkeypatch):
+    size = len(plotter.to_json("a"))
+    monkeypatch.setattr(timeplots.Plotter, "cache_bytes", size + size // 2)
+    plotter.to_json("b")
+    assert len(timeplots.Plotter._cache) == 1
+
+    monkeypatch.setattr(timeplots.Plotter, "cache_bytes", size // 2)
+    timeplots.Plotter.clear_cache()
+    plotter.to_json("a")
+    assert len(timeplots.Plotter._cache) == 0
+
+
+def test_render_cache_hit_skips_build(plotter, monkeypatch):
+    script, div = plotter.components()
+    item = plotter.json_item("a")
+
+    def fail(*args, **kwargs):
+        raise AssertionError("models were built on a cache hit")
+
+    monkeypatch.setattr(timeplots.Plotter, "_replay", fail)
+    other = timeplots.Plotter()
+    other.new_plot("Events over Time", "events")
+    other.add_line("values", *sample_data())
+    assert other.components() == (script, div)
+    assert other.json_item("a") == item
+
+
+def test_json_item_is_a_copy(plotter):
+    item = plotter.json_item("a")
+    item["target_id"] = "changed"
+    assert plotter.json_item("a")["target_id"] == "a"
+
+
+def test_fingerprint_numpy_data(plotter):
+    timestamps, data = sample_data()
+    other = timeplots.Plotter()
+    other.new_plot("Events over Time", "events")
+    values = numpy.array(data)
+    other.add_line("values", timestamps, values)
+    values[0] = 100
+    assert other.fingerprint() == plotter.fingerprint()
+    source = other.active_plot.renderers[-1].data_source
+    assert isinstance(source.data["y"], numpy.ndarray)
+    assert source.data["y"][0] == 0
+
+
+def test_embed_and_render_same_plotter(plotter, tmp_path):
+    plotter.components()
+    assert plotter.json_item("a")["target_id"] == "a"
+    assert plotter.json_item("b")["target_id"] == "b"
+    plotter.render(filename=str(tmp_path / "first"))
+    plotter.render(filename=str(tmp_path / "second"))
+    assert (tmp_path / "first.html").exists()
+    assert (tmp_path / "second.html").exists()
+
+
+def test_fingerprint_copies_data(plotter):
+    timestamps, data = sample_data()
+    other = timeplots.Plotter()
+    other.new_plot("Events over Time", "events")
+    other.add_line("values", timestamps, data)
+    data[0] = 100
+    assert other.fingerprint() == plotter.fingerprint()
+
+
+def test_plots_are_kept(plotter):
+    header = timeplots.models.widgets.Div(text="header")
+    plotter.plots.append(header)
+    plotter.add_html("footer")
+    assert len(plotter.plots) == 3
+    assert plotter.plots[1] is header
+
+
+def test_bucket_table_top_and_series():
+    logplot = pytest.importorskip("timeplots.logplot")
+    table = logplot.BucketTable()
+    events = [("a", 2000), ("b", 1000), ("a", 1000), ("c", 3000), ("a", 3000)]
+    for key, timestamp in events:
+        table.add(key, timestamp)
+
+    rows = table.top(1)
+    assert list(rows) == ["a", "other"]
+    series = table.series(rows["a"])
+    assert list(series) == [(1000, 1), (2000, 1), (3000, 1)]
+    assert list(table.series(rows["other"])) == [(1000, 1), (2000, 0), (3000, 1)]
+
+    assert list(table.top(3)) == ["a", "b", "c"]
+
+
+def test_bucket_table_capacity():
+    logplot = pytest.importorskip("timeplots.logplot")
+    table = logplot.BucketTable(capacity=2)
+    for i in range(100):
+        table.add("big", i % 5)
+        table.add(f"key{i}", i % 5)
+        assert len(table.rows) <= 4
+
+    rows = table.top(1)
+    assert list(rows) == ["big", "other"]
+    assert sum(rows["big"]) == 100
+    assert sum(rows["other"]) == 100
+    assert table.evicted > 0
+
+
+def test_bucket_table_other_key():
+    logplot = pytest.importorskip("timeplots.logplot")
+    table = logplot.BucketTable()
+    events = [("other", 1000)] * 5 + [("a", 2000)] * 3 + [("b", 3000)]
+    for key, timestamp in events:
+        table.add(key, timestamp)
+
+    rows = table.top(1)
+    assert list(rows) == ["other", "(other)"]
+    assert list(table.series(rows["other"]).values) == [5, 0, 0]
+    assert list(table.series(rows["(other)"]).values) == [0, 3, 1]
+    assert table.evicted == 0
+
+
+def test_time_series_round_trip():
+    timestamps, data = sample_data()
+    series = timeplots.TimeSeries.from_datetimes(timestamps, data)
+    assert series.values.typecode == "q"
+    assert series.times[0] == 1583049600000
+    assert series.datetimes() == timestamps
+    assert list(series) == list(zip(series.times, data))
+
+    eastern = timezone(timedelta(hours=-5))
+    aware = [timestamp.replace(tzinfo=eastern) for timestamp in timestamps]
+    series = timeplots.TimeSeries.from_datetimes(aware, data)
+    assert series.datetimes()[0] == datetime(2020, 3, 1, 13)
+
+
+def test_time_series_typecode():
+    assert timeplots.TimeSeries([1, 2], [1.5, 2]).values.typecode == "d"
+    assert timeplots.TimeSeries([1, 2], [1, 2]).values.typecode == "q"
+    assert timeplots.TimeSeries([1], [1], typecode="d").values.typecode == "d"
+    floats = (value for value in [numpy.float32(1.5), 2])
+    assert timeplots.TimeSeries([1, 2], floats).values.typecode == "d"
+    assert timeplots.TimeSeries([1, 2], [numpy.int64(1), 2]).values.typecode == "q"
+    with pytest.raises(ValueError):
+        timeplots.TimeSeries([1, 2], [1])
+
+
+def test_strptime_ms():
+    logtime = timeplots.TimeParser(date_format="%Y-%m-%d %H:%M:%S", minutes=7)
+    for minute in range(0, 60, 11):
+        line = f"2020-03-01 08:{minute:02d}:42 message"
+        expected = timeplots.to_epoch_ms(logtime.strptime(line))
+        assert logtime.strptime_ms(line) == expected
+
+
+def test_missing_time_data_series():
+    series = timeplots.TimeSeries([0, 1000, 4000, 5000], [3, 4, 5, 6])
+    filled = timeplots.missing_time_data(series)
+    assert list(filled) == [
+        (0, 3),
+        (1000, 4),
+        (2000, 0),
+        (3000, 0),
+        (4000, 5),
+        (5000, 6),
+    ]
+
+    timestamps, data = sample_data()
+    expected = list(timeplots.missing_time_data(timestamps[::3], data[::3]))
+    series = timeplots.TimeSeries.from_datetimes(timestamps[::3], data[::3])
+    filled = timeplots.missing_time_data(series)
+    assert list(zip(filled.datetimes(), filled.values)) == expected
+
+    single = timeplots.missing_time_data(timeplots.TimeSeries([1000], [7]))
+    assert list(single) == [(1000, 7)]
+
+    filled = timeplots.missing_time_data(series, default=0.5)
+    assert filled.values.typecode == "d"
+
+    empty = timeplots.missing_time_data(timeplots.TimeSeries())
+    assert len(empty) == 0
+    with pytest.raises(TypeError):
+        timeplots.missing_time_data(series, default=None)
+
+
+def test_plotter_time_series(plotter):
+    timestamps, data = sample_data()
+    series = timeplots.TimeSeries.from_datetimes(timestamps, data)
+    plotter.add_line("series", series)
+    series.append(0, 0)
+    source = plotter.active_plot.renderers[-1].data_source
+    assert list(source.data["x"]) == list(series.times[:-1])
@@ -6,4 +6,12 @@ __author__ = """Greg Mueller"""
 __email__ = "greg@grelleum.com"
 version = "0.2.2"
 
-from .timeplots import Plotter, TimeParser, missing_time_data
+from .timeplots import (
+    Plotter,
+    TimeParser,
+    TimeSeries,
+    colors,
+    from_epoch_ms,
+    missing_time_data,
+    to_epoch_ms,
+)
@@ -17,8 +17,14 @@ Options:
                                     suffix to denote minutes, hours, or days.
   -o, --output=<filename>           Output filename [default: logplot.html].
   -t, --title=<title>               Title for plot [default: Events over Time].
+  -g, --group=<name>                Split into a line per value of the named
+                                    capture group, such as (?P<host>\\S+).
+  -f, --by-file                     Split into a line per input file.
+  -k, --top=<count>                 Plot the top count groups by volume and
+                                    sum the rest as "other" [default: 10].
 """
 
+from array import array
 from collections import Counter, defaultdict, deque
 from fileinput import FileInput
 import re
@@ -28,14 +34,20 @@ from docopt import docopt
 
 import timeplots
 
+progress = None
+
 
 def get_timestamp(logtime, text):
+    global progress
     try:
-        timestamp = logtime.strptime(text)
+        timestamp = logtime.strptime_ms(text)
     except ValueError as e:
         print(repr(e), file=sys.stderr)
     else:
-        print(">>>", timestamp, end="\r", flush=True)
+        # Only convert and print the time when it changes, not for every line.
+        if timestamp != progress:
+            progress = timestamp
+            print(">>>", timeplots.from_epoch_ms(timestamp), end="\r", flush=True)
         return timestamp
 
 
@@ -52,6 +64,119 @@ def match_regex(logtime, lines, expressions):
                 yield expression, get_timestamp(logtime, line)
 
 
+def read_lines(filenames):
+    with FileInput(filenames) as lines:
+        for line in lines:
+            yield lines.filename(), line
+
+
+def match_groups(logtime, lines, expressions, group, by_file):
+    """
+    Yield a group key and timestamp for each matching line.
+    The key is made from the expression when more than one is given,
+    the input filename when by_file is set,
+    and the value of the named capture group when group is set.
+    """
+    regexes = [(exp, re.compile(exp)) for exp in expressions] or [(None, None)]
+    for filename, line in lines:
+        for expression, regex in regexes:
+            match = regex.search(line) if regex else None
+            if regex and not match:
+                continue
+            key = []
+            if len(regexes) > 1:
+                key.append(expression)
+            if by_file:
+                key.append(filename)
+            if group:
+                value = match.groupdict().get(group)
+                if value is None:
+                    continue
+                key.append(value)
+            timestamp = get_timestamp(logtime, line)
+            if timestamp is not None:
+                yield " ".join(key), timestamp
+
+
+class BucketTable(object):
+    """
+    Count events by group key and time bucket in a single pass.
+    Time buckets are in epoch milliseconds from TimeParser.strptime_ms.
+    Each time bucket gets a column index as it is first seen,
+    and each group key gets a row of int64 counts indexed by column.
+
+    To bound memory with many distinct keys, once twice capacity keys
+    are tracked, all but the capacity keys with the most events
+    are folded into the other row.  A key that is folded and seen again
+    starts a new row, so the top keys are approximate when evicted
+    is not zero.
+    """
+
+    def __init__(self, capacity=100):
+        self.capacity = capacity
+        self.columns = {}
+        self.rows = {}
+        self.totals = {}
+        self.other = array("q")
+        self.evicted = 0
+
+    def add(self, key, timestamp):
+        column = self.columns.setdefault(timestamp, len(self.columns))
+        row = self.rows.get(key)
+        if row is None:
+            if len(self.rows) >= 2 * self.capacity:
+                self.evict()
+            row = self.rows[key] = array("q")
+            self.totals[key] = 0
+        if column >= len(row):
+            row.extend([0] * (column + 1 - len(row)))
+        row[column] += 1
+        self.totals[key] += 1
+
+    def ranked(self):
+        """Return the tracked keys, with the most events first."""
+        return sorted(self.totals, key=self.totals.get, reverse=True)
+
+    def evict(self):
+        """Fold all but the capacity largest rows into the other row."""
+        for key in self.ranked()[self.capacity :]:
+            add_row(self.other, self.rows.pop(key))
+            del self.totals[key]
+            self.evicted += 1
+
+    def top(self, count, other="other"):
+        """
+        Return a dict of the count largest rows by volume,
+        with the remaining rows summed into a row named other.
+        If a key is already named other, it is put in parentheses.
+        """
+        ranked = self.ranked()
+        rows = {key: self.rows[key] for key in ranked[:count]}
+        total = array("q", self.other)
+        for key in ranked[count:]:
+            add_row(total, self.rows[key])
+        if any(total):
+            while other in rows:
+                other = f"({other})"
+            rows[other] = total
+        return rows
+
+    def series(self, row):
+        """Return a TimeSeries of the counts from a row in time order."""
+        times = sorted(self.columns)
+        columns = (self.columns[time] for time in times)
+        data = (row[column] if column < len(row) else 0 for column in columns)
+        return timeplots.TimeSeries(times, data)
+
+
+def add_row(total, row):
+    """Add the counts in row to total, extending total as needed."""
+    if len(total) < len(row):
+        total.extend([0] * (len(row) - len(total)))
+    for column, value in enumerate(row):
+        total[column] += value
+
+
 def get_interval(interval):
     if not interval:
         return "events", {}
@@ -73,13 +198,44 @@ def main():
     title = args.get("--title")
     output_filename = args.get("--output")
     units, interval = get_interval(args.get("--interval"))
-    lines = (line for line in FileInput(args.get("<filename>")))
+    group = args.get("--group")
+    by_file = args.get("--by-file")
+    top = args.get("--top")
+    filenames = args.get("<filename>")
+
+    if group:
+        if not expressions:
+            sys.exit("A group requires an expression with -e.")
+        missing = [e for e in expressions if group not in re.compile(e).groupindex]
+        if missing:
+            sys.exit(f"No capture group named '{group}' in: {', '.join(missing)}")
+
+    if not top.isnumeric():
+        sys.exit("Top count must be zero or a positive whole number.")
+    top = int(top)
+    # Keep a color for the other line, as each line takes one from the palette.
+    max_top = len(timeplots.colors) - 1
+    if top > max_top:
+        print(f"Plotting the top {max_top} groups.", file=sys.stderr)
+        top = max_top
 
     logtime = timeplots.TimeParser(date_format=args.get("<dateformat>"), **interval)
     plotter = timeplots.Plotter(width=1400)
     plotter.new_plot(title=title, units=units)
 
-    if expressions:
+    if group or by_file:
+        table = BucketTable()
+        lines = read_lines(filenames)
+        for key, timestamp in match_groups(logtime, lines, expressions, group, by_file):
+            table.add(key, timestamp)
+        if table.evicted:
+            note = f"Too many groups to track, top {top} groups are approximate."
+            print(note, file=sys.stderr)
+        for key, row in table.top(top).items():
+            series = timeplots.missing_time_data(table.series(row))
+            plotter.add_line(key, series)
+    elif expressions:
+        lines = (line for line in FileInput(filenames))
         # Prefer creating buckets over defaultdict:
         # - Predefined buckets assign colors based on order of command line args.
         # - With defaultdict, colors are assigned based on order in logs.
@@ -88,14 +244,13 @@ def main():
             buckets[expression].append(timestamp)
         for expression, times in buckets.items():
             c = Counter(times)
-            times, data = zip(*sorted(c.items()))
-            times, data = zip(*timeplots.missing_time_data(times, data))
-            plotter.add_line(expression, times, data)
+            series = timeplots.TimeSeries(*zip(*sorted(c.items())))
+            plotter.add_line(expression, timeplots.missing_time_data(series))
     else:
+        lines = (line for line in FileInput(filenames))
         c = Counter(match_all(logtime, lines))
-        times, data = zip(*sorted(c.items()))
-        times, data = zip(*timeplots.missing_time_data(times, data))
-        plotter.add_line("values", times, data)
+        series = timeplots.TimeSeries(*zip(*sorted(c.items())))
+        plotter.add_line("values", timeplots.missing_time_data(series))
 
     print(f"Saving to file: '{output_filename}'")
     plotter.render(filename=output_filename, title=title)
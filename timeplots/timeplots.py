@@ -10,11 +10,59 @@
 # import os
 # import re
 
-from datetime import datetime, timedelta
+from array import array
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
 from functools import lru_cache
+from threading import Lock
+import hashlib
+import json
 import sys
 
-from bokeh import layouts, models, plotting, palettes
+from bokeh import embed, layouts, models, plotting, palettes
+import numpy
+
+EPOCH = datetime(1970, 1, 1)
+MILLISECOND = timedelta(milliseconds=1)
+MIN_EPOCH_MS = (datetime.min - EPOCH) // MILLISECOND
+
+
+class _RenderCache(object):
+    """
+    Private least recently used cache of rendered html and json strings,
+    limited by number of entries and total length of the strings.
+    """
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.total = 0
+        self.lock = Lock()
+
+    def get(self, key):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key][0]
+
+    def put(self, key, result, max_entries, max_bytes):
+        strings = result if isinstance(result, tuple) else (result,)
+        size = sum(len(string) for string in strings)
+        with self.lock:
+            if key in self.entries or size > max_bytes:
+                return
+            self.entries[key] = result, size
+            self.total += size
+            while len(self.entries) > max_entries or self.total > max_bytes:
+                _, (_, size) = self.entries.popitem(last=False)
+                self.total -= size
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.total = 0
+
+    def __len__(self):
+        return len(self.entries)
 
 
 class Plotter(object):
@@ -26,16 +74,65 @@ class Plotter(object):
     plotter.add_line("tx", timestamps, tx_data)
     plotter.render("optional_filename.html")
 
+    add_line also accepts a TimeSeries in place of timestamps and data:
+    plotter.add_line("rx", rx_series)
+
+    To embed the plots in a web page instead of writing a file:
+    script, div = plotter.components()
+    item = plotter.json_item("target_div_id")
+    text = plotter.to_json("target_div_id")
+
+    Bokeh models are only built when they are needed.
+    Embeddable output is cached by a fingerprint of the plot options
+    and data series, so an identical report is served from the cache
+    without building or serializing any Bokeh models.
+    Models added to plots directly are included by render,
+    but not by the embeddable output, which is built from the
+    new_plot, add_line and add_html calls alone.
+
+    The render cache is shared by all plotters, and holds up to
+    cache_size entries and cache_bytes of html and json in total.
+    Set these on Plotter to change the limits, or to 0 to disable it.
     """
 
-    x_range = plotting.figure().x_range
+    cache_size = 128
+    cache_bytes = 64 * 1024 * 1024
+    _cache = _RenderCache()
 
     def __init__(self, *, width=1400, height=400, line_width=2):
         self.width = width
         self.height = height
         self.line_width = line_width
-        self.plots = []
-        self.active_plot = None
+        self.colors = list(colors)
+        self.units = None
+        self.x_range = models.DataRange1d()
+        self._operations = []
+        self._digests = []
+        self._applied = 0
+        self._plots = []
+        self._active_plot = None
+
+    @property
+    def plots(self):
+        """List of Bokeh models on the page, built on first access."""
+        self._build()
+        return self._plots
+
+    @plots.setter
+    def plots(self, plots):
+        self._build()
+        self._plots = plots
+
+    @property
+    def active_plot(self):
+        """The most recent plot created by 'new_plot', or None."""
+        self._build()
+        return self._active_plot
+
+    @active_plot.setter
+    def active_plot(self, plot):
+        self._build()
+        self._active_plot = plot
 
     def new_plot(self, title, units, *, line_width=None, precision=2):
         """
@@ -43,16 +140,26 @@ class Plotter(object):
         a line for each data series on the y-axis.
         """
 
-        plot = plotting.figure(title=title, tools=[])
-        self.active_plot = plot
-        self.plots.append(plot)
         self.colors = list(colors)
         self.units = units
         self.line_width = line_width or self.line_width
+        self._record(
+            ("new_plot", title, units, self.line_width, precision),
+            self._new_figure,
+            title,
+            units,
+            self.line_width,
+            precision,
+        )
+
+    def _new_figure(self, x_range, title, units, line_width, precision):
+        """Build the Bokeh figure recorded by 'new_plot'."""
+
+        plot = plotting.figure(title=title, tools=[])
 
         plot.plot_width = self.width
         plot.plot_height = self.height
-        plot.x_range = self.x_range
+        plot.x_range = x_range
 
         datetime_tick_formats = {
             key: ["%a %b %d %H:%M:%S"]
@@ -80,7 +187,7 @@ class Plotter(object):
             tooltips=[
                 ("Name", "$name"),
                 ("Time", "@x{%a %m/%d %H:%M:%S}"),
-                (self.units, units_formats),
+                (units, units_formats),
             ],
             formatters={"x": "datetime", "Time": "datetime", "@x": "datetime"},
         )
@@ -96,46 +203,177 @@ class Plotter(object):
         plot.add_tools(models.RedoTool())
         plot.add_tools(models.ResetTool())
         plot.add_tools(models.SaveTool())
+        return plot
 
-    def add_line(self, name, timestamps, data, color=None, line_width=None):
-        """Add a line to the active plot."""
+    def add_line(self, name, timestamps, data=None, color=None, line_width=None):
+        """
+        Add a line to the active plot.
+        timestamps is either a sequence of datetime objects with data
+        a sequence of values, or a TimeSeries with data left as None.
+        """
 
-        if self.active_plot is None:
+        if not any(key[0] == "new_plot" for key, *_ in self._operations):
             error = "Error: You must create a 'new_plot' before adding a line."
             print(error, file=sys.stderr)
+            return
+
+        # Copy the data, keeping its type, so later changes by the caller
+        # cannot make the cache fingerprint differ from the plot.
+        if isinstance(timestamps, TimeSeries):
+            timestamps = TimeSeries(
+                timestamps.times, timestamps.values, typecode=timestamps.values.typecode
+            )
+        else:
+            timestamps, data = _copy(timestamps), _copy(data)
 
         color = color or self.colors.pop()
+        line_width = line_width or self.line_width
+        self._record(
+            ("add_line", name, timestamps, data, color, line_width),
+            self._draw_line,
+            name,
+            timestamps,
+            data,
+            color,
+            line_width,
+        )
+
+    def _draw_line(self, plot, name, timestamps, data, color, line_width):
+        """Draw the line recorded by 'add_line' on a Bokeh figure."""
+
+        if isinstance(timestamps, TimeSeries):
+            # Epoch milliseconds are what Bokeh plots on a datetime axis,
+            # and numpy arrays are serialized as binary buffers.
+            timestamps, data = (
+                numpy.array(timestamps.times),
+                numpy.array(timestamps.values),
+            )
 
-        self.active_plot.line(
+        plot.line(
             timestamps,
             data,
-            line_width=line_width or self.line_width,
+            line_width=line_width,
             color=color,
             name=name,
             legend_label=name,
         )
 
         # Legend click policy must be defined after a legend is added.
-        self.active_plot.legend.click_policy = "hide"  # other optins: mute
-        self.active_plot.legend.location = "top_left"
+        plot.legend.click_policy = "hide"  # other optins: mute
+        plot.legend.location = "top_left"
 
     def add_html(self, html):
         """Add html to the page."""
-        header = models.widgets.Div(text=html)
-        self.plots.append(header)
+        self._record(("add_html", html), models.widgets.Div, text=html)
+
+    def _record(self, key, builder, *args, **kwargs):
+        """
+        Private function to record an operation for a deferred build.
+        key identifies the operation in the render cache fingerprint.
+        """
+        self._operations.append((key, builder, args, kwargs))
+
+    def _build(self):
+        """
+        Private function to apply recorded operations to plots,
+        that have not been applied yet.
+        """
+        operations = self._operations[self._applied :]
+        self._applied = len(self._operations)
+        self._active_plot = self._replay(
+            operations, self._plots, self._active_plot, self.x_range
+        )
+
+    def _replay(self, operations, plots, active_plot, x_range):
+        """
+        Private function to build the Bokeh models from recorded operations.
+        Appends the models to plots and returns the active plot.
+        Plots on a page share an x_range so they pan and zoom together.
+        """
+        for key, builder, args, kwargs in operations:
+            if key[0] == "new_plot":
+                active_plot = builder(x_range, *args, **kwargs)
+                plots.append(active_plot)
+            elif key[0] == "add_line":
+                builder(active_plot, *args, **kwargs)
+            else:
+                plots.append(builder(*args, **kwargs))
+        return active_plot
+
+    def fingerprint(self):
+        """Return a hex digest identifying the plot options and data series."""
+        # Digests of recorded operations are kept, as their data is a copy.
+        for key, *_ in self._operations[len(self._digests) :]:
+            self._digests.append(_fingerprint(*key))
+        return _fingerprint(self.width, self.height, *self._digests)
+
+    def _cached(self, key, render):
+        """
+        Private function to return a cached render result,
+        or call render and store the result in the cache.
+        render returns a string or a tuple of strings.
+        """
+        key = (self.fingerprint(),) + key
+        result = self._cache.get(key)
+        if result is not None:
+            return result
+
+        # Build a new set of models for each render, as the models
+        # belong to the document they were first embedded in.
+        plots = []
+        self._replay(self._operations, plots, None, models.DataRange1d())
+        result = render(layouts.column(*plots))
+
+        self._cache.put(key, result, self.cache_size, self.cache_bytes)
+        return result
+
+    @classmethod
+    def clear_cache(cls):
+        """Remove all entries from the render cache."""
+        cls._cache.clear()
+
+    def components(self):
+        """
+        Return a tuple of (script, div) html strings
+        for embedding the plots in a web page.
+        """
+        return self._cached(("components",), embed.components)
+
+    def json_item(self, target=None):
+        """
+        Return a JSON compatible dict for embedding the plots
+        in a web page with Bokeh.embed.embed_item in javascript.
+        Each call returns a new dict, parsed from to_json.
+        """
+        return json.loads(self.to_json(target))
+
+    def to_json(self, target=None):
+        """
+        Return the json_item as a JSON string,
+        as cached, for sending to a web page without parsing it.
+        """
+        return self._cached(
+            ("json_item", target),
+            lambda layout: json.dumps(embed.json_item(layout, target)),
+        )
 
     def render(self, *, filename=None, title=""):
         """Display the plots or write to file."""
 
+        layout = layouts.column(*self.plots)
         if filename is None:
             plotting.output_notebook()
-            plotting.show(layouts.column(*self.plots))
+            plotting.show(layout)
 
         else:
             if not filename.endswith(".html"):
                 filename = f"{filename}.html"
             plotting.output_file(filename, title=title, mode="inline")
-            plotting.save(layouts.column(*self.plots))
+            plotting.save(layout)
+
+        # Release the plots from the document, so they can be rendered again.
+        if layout.document is not None:
+            layout.document.remove_root(layout)
 
 
 class TimeParser(object):
@@ -169,6 +407,26 @@ class TimeParser(object):
             timestamp = timestamp - mod
         return timestamp
 
+    @lru_cache()
+    def _strptime_ms(self, text):
+        """
+        Private function to get milliseconds since the epoch from text,
+        and truncate to specific period if self.delta is set.
+        Periods are aligned to datetime.min, as in _strptime.
+        """
+        timestamp = to_epoch_ms(datetime.strptime(text, self.date_format))
+        if self.delta:
+            timestamp -= (timestamp - MIN_EPOCH_MS) % (self.delta * 1000)
+        return timestamp
+
+    def strptime_ms(self, text):
+        """
+        Return milliseconds since the epoch from begining of string object.
+        Will ignore end portion of string that does not contain
+        the date/time information.
+        """
+        return self._strptime_ms(self._date_text(text))
+
     @lru_cache()
     def strptime(self, text):
         """
@@ -176,15 +434,18 @@ class TimeParser(object):
         Will ignore end portion of string that does not contain
         the date/time information.
         """
+        timestamp = self._strptime(self._date_text(text))
+        return timestamp
+
+    def _date_text(self, text):
+        """Private function to get the date/time portion of text."""
         if not self.date_format:
             self.identify_format(text)
 
         words = [word.strip() for word in text.split(self.delimiter) if word]
         words = words[: self.format_length]
 
-        text = self.delimiter.join(words)
-        timestamp = self._strptime(text)
-        return timestamp
+        return self.delimiter.join(words)
 
     def identify_format(self, text):
 
@@ -222,7 +483,7 @@ class TimeParser(object):
         )
 
 
-def missing_time_data(timestamps, data, *, default=0):
+def missing_time_data(timestamps, data=None, *, default=0):
     """
     Fill in missing times with a default value, usually zero.
 
@@ -230,6 +491,10 @@ def missing_time_data(timestamps, data, *, default=0):
     data is a sequence of values matching those timestamps.
     default is a value that will be added to the output sequence
       when an expected timestamp is missing.
+    Returns a generator of (timestamp, value) tuples.
+
+    Alternatively timestamps is a TimeSeries and data is None,
+    which returns a new TimeSeries with the missing times filled in.
 
     Example Input:
         timestamps = [8:00, 9:00, 12:00]  # pretend they are datetime.
@@ -249,13 +514,41 @@ def missing_time_data(timestamps, data, *, default=0):
     before providing a value.
     """
 
+    if isinstance(timestamps, TimeSeries):
+        typecode = timestamps.values.typecode
+        try:
+            if typecode == "q":
+                typecode = _typed_array([default]).typecode
+            else:
+                array(typecode, [default])
+        except TypeError:
+            error = f"default {default!r} does not fit in a {typecode!r} TimeSeries."
+            raise TypeError(error) from None
+        series = TimeSeries(typecode=typecode)
+        for time, value in _missing_time_data(
+            timestamps.times, timestamps.values, default
+        ):
+            series.append(time, value)
+        return series
+    return _missing_time_data(timestamps, data, default)
+
+
+def _missing_time_data(timestamps, data, default):
+    """
+    Private generator for missing_time_data.
+    Works on datetime objects or epoch milliseconds alike.
+    """
+
+    if not len(timestamps):
+        return
+
     # Find the lowest period between timestamps.
     if len(timestamps) > 1:
         minimum_delta = min(
             after - before for after, before in zip(timestamps[1:], timestamps)
         )
     else:
-        minimum_delta = timedelta(0)
+        minimum_delta = timestamps[0] - timestamps[0]
 
     # Make generators from the input data
     timestamps = (t for t in timestamps)
@@ -284,6 +577,155 @@ def missing_time_data(timestamps, data, *, default=0):
         upper_limit = previous + minimum_delta * 1.5
 
 
+class TimeSeries(object):
+    """
+    Columnar time series for compact storage of many data points.
+    times is an int64 array of milliseconds since the epoch (UTC),
+    values is a typed array, float ("d") if any value is a float,
+    otherwise int64 ("q"), unless a typecode is given.
+
+    Usage:
+    series = timeplots.TimeSeries()
+    series.append(timeplots.to_epoch_ms(timestamp), 17)
+    series = timeplots.TimeSeries.from_datetimes(timestamps, data)
+    timestamps = series.datetimes()
+    """
+
+    __slots__ = ("times", "values")
+
+    def __init__(self, times=(), values=(), *, typecode=None):
+        if typecode is None and isinstance(values, array):
+            typecode = values.typecode
+        self.times = array("q", times)
+        if typecode is None:
+            self.values = _typed_array(values)
+        else:
+            self.values = array(typecode, values)
+        if len(self.times) != len(self.values):
+            raise ValueError("times and values must be the same length.")
+
+    @classmethod
+    def from_datetimes(cls, timestamps, data, *, typecode=None):
+        """Create a TimeSeries from datetime objects and matching values."""
+        return cls((to_epoch_ms(t) for t in timestamps), data, typecode=typecode)
+
+    def append(self, time, value):
+        """Add a data point with time in milliseconds since the epoch."""
+        self.times.append(time)
+        self.values.append(value)
+
+    def datetimes(self):
+        """Return the times as a list of datetime objects."""
+        return [from_epoch_ms(time) for time in self.times]
+
+    def fingerprint(self):
+        """Return the raw bytes identifying this series."""
+        return b"".join(
+            (
+                self.values.typecode.encode(),
+                self.times.tobytes(),
+                self.values.tobytes(),
+            )
+        )
+
+    def __len__(self):
+        return len(self.times)
+
+    def __iter__(self):
+        return zip(self.times, self.values)
+
+    def __repr__(self):
+        return (
+            f"<{self.__class__.__name__}: ["
+            f"length: {len(self)}, "
+            f"typecode: {repr(self.values.typecode)}, "
+            "]>"
+        )
+
+
+def _typed_array(values):
+    """
+    Private function to return values in an int64 array,
+    or in a float array if any value is not an integer.
+    """
+    if isinstance(values, (list, tuple)):
+        try:
+            return array("q", values)
+        except TypeError:
+            return array("d", values)
+
+    result = array("q")
+    values = iter(values)
+    for value in values:
+        try:
+            result.append(value)
+        except TypeError:
+            result = array("d", result)
+            result.append(value)
+            result.extend(values)
+            break
+    return result
+
+
+def to_epoch_ms(timestamp):
+    """
+    Return milliseconds since the epoch from a datetime object.
+    Naive datetime objects are treated as UTC, as Bokeh does.
+    """
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return (timestamp - EPOCH) // MILLISECOND
+
+
+def from_epoch_ms(time):
+    """Return a naive datetime object from milliseconds since the epoch."""
+    return EPOCH + time * MILLISECOND
+
+
+def _copy(values):
+    """Private function to copy a data series, keeping numpy arrays as is."""
+    return values.copy() if hasattr(values, "copy") else list(values)
+
+
+def _fingerprint(*values):
+    """
+    Private function to return a hex digest of values.
+    Used to key the render cache on plot options and data series.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for value in values:
+        if isinstance(value, TimeSeries):
+            value = value.fingerprint()
+        elif isinstance(value, str):
+            value = value.encode()
+        elif hasattr(value, "__len__") and not isinstance(value, bytes):
+            value = _series_bytes(value)
+        elif not isinstance(value, bytes):
+            value = repr(value).encode()
+        digest.update(value)
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _series_bytes(values):
+    """
+    Private function to return bytes identifying a data series.
+    Numbers and naive datetime objects are hashed from numpy buffers,
+    anything else from the repr.
+    """
+    try:
+        series = numpy.asarray(values)
+    except ValueError:
+        return repr(tuple(values)).encode()
+    if series.dtype.kind in "biufmM":
+        return series.dtype.str.encode() + series.tobytes()
+    if series.dtype.kind == "O" and all(
+        isinstance(value, datetime) and value.tzinfo is None for value in values
+    ):
+        return b"datetime" + series.astype("datetime64[us]").tobytes()
+    return repr(tuple(values)).encode()
+
+
 colors = [
     "#0000FF",
     "#00FF00",